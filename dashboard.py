@@ -1,81 +1,106 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_init import get_db
+from google.cloud.firestore_v1.base_query import FieldFilter
 from datetime import datetime, timedelta
-import pandas as pd
-import plotly.express as px
-import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 
-# Load environment variables
-load_dotenv()
+# pandas and plotly are imported inside the functions that need them so
+# reruns don't pay the import cost before any data is requested
 
-# Initialize Firebase
-cred = credentials.Certificate(os.getenv('GOOGLE_APPLICATION_CREDENTIALS'))
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+@st.cache_resource
+def get_firestore():
+    """Firestore client shared across Streamlit sessions."""
+    return get_db()
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_email_metrics(days=7):
-    """Get email metrics for the last N days."""
+    """Get email metrics for the last N days.
+
+    Cached for 5 minutes per `days` value so Streamlit reruns (every
+    widget interaction) don't re-stream the Firestore collections.
+    """
+    import pandas as pd
+
+    db = get_firestore()
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
-    
-    # Get sent emails
-    sent_emails = db.collection('email_sent').where('timestamp', '>=', start_date.isoformat()).stream()
-    sent_data = [doc.to_dict() for doc in sent_emails]
-    
-    # Get opens
-    opens = db.collection('email_opens').where('timestamp', '>=', start_date.isoformat()).stream()
-    open_data = [doc.to_dict() for doc in opens]
-    
-    # Get clicks
-    clicks = db.collection('email_clicks').where('timestamp', '>=', start_date.isoformat()).stream()
-    click_data = [doc.to_dict() for doc in clicks]
-    
+
+    def _fetch(collection):
+        query = db.collection(collection).where(
+            filter=FieldFilter('timestamp', '>=', start_date.isoformat()))
+        return pd.DataFrame.from_records([doc.to_dict() for doc in query.stream()])
+
+    # The three collections are independent, so fetch them concurrently:
+    # wall-clock is the slowest query instead of the sum of all three
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        sent_future = executor.submit(_fetch, 'email_sent')
+        opens_future = executor.submit(_fetch, 'email_opens')
+        clicks_future = executor.submit(_fetch, 'email_clicks')
+        sent_df = sent_future.result()
+        opens_df = opens_future.result()
+        clicks_df = clicks_future.result()
+
+    # Convert columns to their final dtypes once here so the chart
+    # builders receive typed frames
+    if not opens_df.empty:
+        opens_df['timestamp'] = pd.to_datetime(opens_df['timestamp'])
+        opens_df['time_spent'] = pd.to_numeric(opens_df['time_spent'], errors='coerce')
+
     return {
-        'sent': sent_data,
-        'opens': open_data,
-        'clicks': click_data
+        'sent': sent_df,
+        'opens': opens_df,
+        'clicks': clicks_df
     }
 
+@st.cache_data(ttl=300, show_spinner=False)
+def get_metric_counts(days=7):
+    """Get sent/open/click totals via server-side COUNT aggregations.
+
+    The summary metrics and rate charts only need totals, so this avoids
+    downloading any document payloads for them.
+    """
+    db = get_firestore()
+    start_date = (datetime.now() - timedelta(days=days)).isoformat()
+
+    def _count(collection):
+        query = db.collection(collection).where(
+            filter=FieldFilter('timestamp', '>=', start_date))
+        return query.count().get()[0][0].value
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        sent_future = executor.submit(_count, 'email_sent')
+        opens_future = executor.submit(_count, 'email_opens')
+        clicks_future = executor.submit(_count, 'email_clicks')
+        return {
+            'sent': sent_future.result(),
+            'opens': opens_future.result(),
+            'clicks': clicks_future.result()
+        }
+
 def create_time_spent_chart(metrics):
     """Create chart for time spent reading."""
-    df = pd.DataFrame(metrics['opens'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df['time_spent'] = df['time_spent'].astype(float)
-    
-    fig = px.histogram(df, x='time_spent', 
+    import plotly.express as px
+
+    fig = px.histogram(metrics['opens'], x='time_spent',
                       title='Time Spent Reading Emails',
                       labels={'time_spent': 'Time Spent (seconds)'})
     return fig
 
-def create_open_rate_chart(metrics):
+def create_open_rate_chart(counts):
     """Create chart for open rates."""
-    sent_count = len(metrics['sent'])
-    open_count = len(metrics['opens'])
-    
-    data = {
-        'Metric': ['Sent', 'Opened'],
-        'Count': [sent_count, open_count]
-    }
-    df = pd.DataFrame(data)
-    
-    fig = px.pie(df, values='Count', names='Metric',
+    import plotly.express as px
+
+    fig = px.pie(values=[counts['sent'], counts['opens']],
+                 names=['Sent', 'Opened'],
                  title='Email Open Rate')
     return fig
 
-def create_click_through_chart(metrics):
+def create_click_through_chart(counts):
     """Create chart for click-through rates."""
-    open_count = len(metrics['opens'])
-    click_count = len(metrics['clicks'])
-    
-    data = {
-        'Metric': ['Opened', 'Clicked'],
-        'Count': [open_count, click_count]
-    }
-    df = pd.DataFrame(data)
-    
-    fig = px.pie(df, values='Count', names='Metric',
+    import plotly.express as px
+
+    fig = px.pie(values=[counts['opens'], counts['clicks']],
+                 names=['Opened', 'Clicked'],
                  title='Click-Through Rate')
     return fig
 
@@ -85,21 +110,23 @@ def main():
     # Date range selector
     days = st.slider('Select time range (days)', 1, 30, 7)
     
-    # Get metrics
+    # Counts come from cheap aggregation queries; full documents are only
+    # fetched for the histogram and the raw data tables
+    counts = get_metric_counts(days)
     metrics = get_email_metrics(days)
-    
+
     # Display summary metrics
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Emails Sent", len(metrics['sent']))
+        st.metric("Emails Sent", counts['sent'])
     with col2:
-        st.metric("Emails Opened", len(metrics['opens']))
+        st.metric("Emails Opened", counts['opens'])
     with col3:
-        st.metric("Links Clicked", len(metrics['clicks']))
-    
+        st.metric("Links Clicked", counts['clicks'])
+
     # Display charts
-    st.plotly_chart(create_open_rate_chart(metrics))
-    st.plotly_chart(create_click_through_chart(metrics))
+    st.plotly_chart(create_open_rate_chart(counts))
+    st.plotly_chart(create_click_through_chart(counts))
     st.plotly_chart(create_time_spent_chart(metrics))
     
     # Display raw data
@@ -108,13 +135,13 @@ def main():
     tab1, tab2, tab3 = st.tabs(['Sent', 'Opens', 'Clicks'])
     
     with tab1:
-        st.dataframe(pd.DataFrame(metrics['sent']))
-    
+        st.dataframe(metrics['sent'])
+
     with tab2:
-        st.dataframe(pd.DataFrame(metrics['opens']))
-    
+        st.dataframe(metrics['opens'])
+
     with tab3:
-        st.dataframe(pd.DataFrame(metrics['clicks']))
+        st.dataframe(metrics['clicks'])
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
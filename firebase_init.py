@@ -0,0 +1,38 @@
+import firebase_admin
+from firebase_admin import credentials, firestore
+import functools
+import logging
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=1)
+def get_db():
+    """Return the shared Firestore client, initializing Firebase if needed.
+
+    Safe to call from any module in the same process: the default app is
+    only initialized once, so the service account file is only read and
+    parsed a single time. The client itself is memoized too, so every
+    caller multiplexes over one long-lived gRPC channel instead of each
+    module opening its own connection.
+    """
+    if not firebase_admin._apps:
+        cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+        if cred_path:
+            if not os.path.exists(cred_path):
+                logger.error(f"Firebase credentials file not found at: {cred_path}")
+                raise Exception(f"Firebase credentials file not found: {cred_path}")
+            firebase_admin.initialize_app(credentials.Certificate(cred_path))
+        else:
+            # No key file configured: fall back to Application Default
+            # Credentials, so on GCP the metadata server supplies cached
+            # tokens and no service-account JSON needs to ship at all
+            logger.info("GOOGLE_APPLICATION_CREDENTIALS not set, using application default credentials")
+            firebase_admin.initialize_app(credentials.ApplicationDefault())
+        logger.info("Firebase app initialized successfully")
+
+    return firestore.client()
@@ -1,16 +1,25 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-from datetime import datetime
+from firebase_admin import firestore
+from firebase_init import get_db
+from datetime import datetime, timedelta
 import pytz
 import logging
 import time
-from openai import OpenAI
+import httpx
+from openai import OpenAI, RateLimitError, APIConnectionError
 import os
 from dotenv import load_dotenv
 from google.api_core import retry
-from google.cloud.firestore_v1.base_query import BaseQuery
+from google.cloud.firestore_v1 import Increment
+from google.cloud.firestore_v1.base_query import BaseQuery, FieldFilter
 import backoff
+import functools
+import hashlib
+import itertools
+import json
+import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,47 +31,57 @@ logger = logging.getLogger(__name__)
 # Global Firebase variables
 db = None
 
-def initialize_firebase():
-    """Initialize Firebase with credentials"""
-    global db
+# Global OpenAI client, created lazily so the connection pool is shared
+# across all calls instead of rebuilt per request
+openai_client = None
 
-    logger.info(f"db is None? {db is None}")
+# Cap on concurrent OpenAI requests across all worker threads, so the
+# article pool can't burst past the account's rate limits
+OPENAI_CONCURRENCY = int(os.getenv('OPENAI_CONCURRENCY', '8'))
+_openai_sem = threading.BoundedSemaphore(OPENAI_CONCURRENCY)
 
-    cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-    if not cred_path:
-        logger.error("GOOGLE_APPLICATION_CREDENTIALS environment variable not set")
-        raise Exception("Firebase credentials path not set in environment")
-        
-    if not os.path.exists(cred_path):
-        logger.error(f"Firebase credentials file not found at: {cred_path}")
-        raise Exception(f"Firebase credentials file not found: {cred_path}")
-        
-    logger.info(f"Found credentials file at: {cred_path}")
+# How many article titles to translate per batched OpenAI call
+TITLE_BATCH_SIZE = 20
 
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-        logger.info("Firebase app initialized successfully")
-    else:
-        logger.info("Firebase app already initialized")
+# Model configuration. gpt-4o-mini is cheaper and faster than 3.5-turbo
+# at comparable quality for translation/summary work; the tighter token
+# ceilings match what titles and 2-3 sentence summaries actually need,
+# and the lower temperature keeps output deterministic enough for the
+# caches to hit on re-runs.
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+OPENAI_TEMPERATURE = 0.3
+TITLE_MAX_TOKENS = 40
+ENGLISH_SUMMARY_MAX_TOKENS = 180
+CHINESE_SUMMARY_MAX_TOKENS = 220
+
+def get_openai_client():
+    """Return the shared OpenAI client, creating it on first use.
+
+    The explicit httpx client keeps enough keep-alive connections for the
+    worker pool, so concurrent calls reuse TCP+TLS sessions instead of
+    handshaking per request.
+    """
+    global openai_client
+    if openai_client is None:
+        openai_client = OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            http_client=httpx.Client(
+                timeout=30,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
+    return openai_client
 
-    db = firestore.client()
+def initialize_firebase():
+    """Initialize Firebase with credentials"""
+    global db
+    db = get_db()
     logger.info("Firestore client initialized successfully")
-    logger.info(f"After initialization, db is None? {db is None}")
 
-def safe_get_documents(collection_ref, max_attempts=3):
+@backoff.on_exception(backoff.expo, Exception, max_tries=3)
+def safe_get_documents(collection_ref):
     """Safely get documents from a collection with retry logic"""
-    attempt = 0
-    while attempt < max_attempts:
-        try:
-            return list(collection_ref.stream())
-        except Exception as e:
-            attempt += 1
-            if attempt == max_attempts:
-                logger.error(f"Failed to get documents after {max_attempts} attempts: {str(e)}")
-                raise
-            logger.warning(f"Attempt {attempt} failed, retrying in {2 ** attempt} seconds...")
-            time.sleep(3 ** attempt)
+    return list(collection_ref.stream())
 
 @backoff.on_exception(backoff.expo, Exception, max_tries=3)
 def safe_batch_commit(batch):
@@ -72,44 +91,170 @@ def safe_batch_commit(batch):
 def generate_chinese_title(title):
     """Translate the title to Chinese using OpenAI"""
     try:
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a professional translator. Translate the title to Chinese accurately and concisely."},
-                {"role": "user", "content": f"Translate this title to Chinese: {title}"}
-            ],
-            max_tokens=100,
-            temperature=0.7
+        chinese_title = _generate_completion(
+            get_openai_client(),
+            "You are a professional translator. Translate the title to Chinese accurately and concisely.",
+            f"Translate this title to Chinese: {title}",
+            max_tokens=TITLE_MAX_TOKENS
         )
-        chinese_title = response.choices[0].message.content.strip()
+        if chinese_title and not contains_chinese(chinese_title):
+            logger.warning(f"Generated title contains no Chinese characters: {chinese_title}")
         return chinese_title
     except Exception as e:
         logger.error(f"Error generating Chinese title: {str(e)}")
         return ""
 
+# In-process memo of title translations, deduplicating within one run
+_title_cache = {}
+
+def _lookup_cached_titles(titles):
+    """Return {title: chinese_title} for every cached title.
+
+    The in-process memo answers first; the remainder is fetched with a
+    single get_all RPC instead of one document read per title.
+    """
+    hits = {}
+    to_fetch = {}
+    for title in titles:
+        if title in _title_cache:
+            hits[title] = _title_cache[title]
+        else:
+            # Duplicate titles hash to the same key, so the dict
+            # collapses them into one fetched ref
+            key = hashlib.sha256(title.encode('utf-8')).hexdigest()
+            to_fetch[key] = title
+    if to_fetch:
+        try:
+            refs = [db.collection('translation_cache').document(key)
+                    for key in to_fetch]
+            for doc in db.get_all(refs):
+                if not doc.exists:
+                    continue
+                chinese_title = doc.to_dict().get('chinese_title', '')
+                if chinese_title:
+                    title = to_fetch[doc.id]
+                    _title_cache[title] = chinese_title
+                    hits[title] = chinese_title
+        except Exception as e:
+            logger.warning(f"Translation cache lookup failed: {str(e)}")
+    return hits
+
+def _store_cached_titles(translations):
+    """Persist new title translations in one batched write."""
+    created_at = datetime.now(pytz.timezone('Asia/Dubai')).strftime("%Y-%m-%d %H:%M:%S")
+    batch = db.batch()
+    count = 0
+    for title, chinese_title in translations.items():
+        if not chinese_title:
+            continue
+        _title_cache[title] = chinese_title
+        key = hashlib.sha256(title.encode('utf-8')).hexdigest()
+        batch.set(db.collection('translation_cache').document(key), {
+            'title': title,
+            'chinese_title': chinese_title,
+            'created_at': created_at
+        })
+        count += 1
+    if count:
+        try:
+            batch.commit()
+        except Exception as e:
+            logger.warning(f"Failed to write translation cache: {str(e)}")
+
+def translate_titles_batch(titles):
+    """Translate a list of titles to Chinese, one OpenAI call per batch.
+
+    Cached translations (identical headlines recur across runs and wire
+    feeds) are filled in first; only the misses go out in the batched
+    request. Returns a list of the same length and order as `titles`.
+    """
+    cached = _lookup_cached_titles(titles)
+    results = [cached.get(title) for title in titles]
+    miss_indices = [i for i, chinese_title in enumerate(results)
+                    if chinese_title is None]
+
+    if miss_indices:
+        # Near-duplicate wire stories repeat headlines within a run too:
+        # translate each distinct title once and fan the result back out
+        unique = {}
+        for i in miss_indices:
+            unique.setdefault(titles[i].strip().lower(), []).append(i)
+        translated = _translate_titles_uncached(
+            [titles[indices[0]] for indices in unique.values()])
+        for indices, chinese_title in zip(unique.values(), translated):
+            for i in indices:
+                results[i] = chinese_title
+        _store_cached_titles({titles[indices[0]]: chinese_title
+                              for indices, chinese_title
+                              in zip(unique.values(), translated)})
+
+    return results
+
+def _translate_titles_uncached(titles):
+    """Translate a list of titles to Chinese in a single OpenAI call.
+
+    Returns a list of the same length and order as `titles`. Falls back
+    to per-title calls if the batched response can't be used.
+    """
+    if not titles:
+        return []
+    try:
+        client = get_openai_client()
+        numbered = "\n".join(f"{i + 1}. {t}" for i, t in enumerate(titles))
+        with _openai_sem:
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": (
+                        "You are a professional translator. Translate each numbered "
+                        "news title to Chinese accurately and concisely. Respond with "
+                        'a JSON object {"translations": [...]} containing exactly one '
+                        "string per input title, in the same order.")},
+                    {"role": "user", "content": numbered}
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=TITLE_MAX_TOKENS * len(titles),
+                temperature=OPENAI_TEMPERATURE
+            )
+        translations = json.loads(response.choices[0].message.content)["translations"]
+        if len(translations) == len(titles):
+            return [t.strip() for t in translations]
+        logger.warning("Batched title translation returned wrong length, falling back")
+    except Exception as e:
+        logger.error(f"Error in batched title translation: {str(e)}")
+
+    return [generate_chinese_title(t) for t in titles]
+
+# Precompiled CJK matcher: a regex search runs in C instead of a
+# per-character Python comparison loop
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+def contains_chinese(text):
+    """Check whether text contains at least one Chinese character"""
+    return bool(_CJK_RE.search(text))
+
+@functools.lru_cache(maxsize=128)
 def clean_source_name(source):
     """Remove 'Crawler' from source name if present"""
-    if source.endswith('Crawler'):
-        return source[:-7]  # Remove last 7 characters ('Crawler')
-    return source
+    # The set of distinct source strings is small, so cache the results;
+    # removesuffix does the endswith check and slice in one C call
+    return source.removesuffix('Crawler')
 
 def count_today_news():
     """Count total records in today_news collection"""
     try:
         today_news_ref = db.collection('today_news')
-        docs = today_news_ref.stream()
-        
-        # Count documents and organize by source
-        total_count = 0
-        source_counts = {}
-        
-        for doc in docs:
-            total_count += 1
-            data = doc.to_dict()
-            source = data.get('article_info', {}).get('source', 'unknown')
-            source_counts[source] = source_counts.get(source, 0) + 1
-        
+
+        # Server-side COUNT aggregation: one RPC instead of N billed reads
+        total_count = today_news_ref.count().get()[0][0].value
+
+        # Per-source breakdown comes from the stats doc maintained by
+        # get_today_news: a single doc read instead of streaming
+        dubai_tz = pytz.timezone('Asia/Dubai')
+        today_str = datetime.now(dubai_tz).strftime("%Y-%m-%d")
+        stats_doc = db.collection('today_news_stats').document(today_str).get()
+        source_counts = stats_doc.to_dict() if stats_doc.exists else {}
+
         # Print results
         logger.info("\n=== Today News Collection Statistics ===")
         logger.info(f"Total records: {total_count}")
@@ -128,60 +273,117 @@ def delete_old_data():
     """Delete all documents from today_news collection"""
     try:
         today_news_ref = db.collection('today_news')
-        docs = today_news_ref.stream()
-        
-        # Create a batch for deletion
+
+        # Firestore batches cap at 500 operations, so build one batch per
+        # chunk of 500 and commit the chunks in parallel. The stats docs
+        # are cleared along with the articles they count.
+        batches = []
         batch = db.batch()
+        chunk_size = 0
         count = 0
-        
-        # Add all documents to the batch for deletion
-        for doc in docs:
-            batch.delete(doc.reference)
-            count += 1
-        
-        # Commit the batch deletion
+
+        for collection in (today_news_ref, db.collection('today_news_stats')):
+            for doc in collection.stream():
+                batch.delete(doc.reference)
+                chunk_size += 1
+                count += 1
+                if chunk_size >= 500:
+                    batches.append(batch)
+                    batch = db.batch()
+                    chunk_size = 0
+
+        if chunk_size > 0:
+            batches.append(batch)
+
         if count > 0:
-            batch.commit()
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                futures = [executor.submit(safe_batch_commit, b) for b in batches]
+                for future in futures:
+                    future.result()
             logger.info(f"Deleted {count} old documents from today_news collection")
         else:
             logger.info("No old documents to delete")
-            
+
     except Exception as e:
         logger.error(f"Error deleting old data: {str(e)}")
         raise
 
-def generate_summaries(content):
-    """Generate English and Chinese summaries using OpenAI"""
-    try:
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
-        # Generate English summary
-        english_response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Create a concise 2-3 sentence summary of the news article."},
-                {"role": "user", "content": f"Summarize this news article:\n\n{content}"}
-            ],
-            max_tokens=300,
-            temperature=0.7
-        )
-        english_summary = english_response.choices[0].message.content.strip()
-        
-        # Wait 5 seconds before making next API call
-        time.sleep(5)
-        
-        # Generate Chinese summary
-        chinese_response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+@backoff.on_exception(backoff.expo, (RateLimitError, APIConnectionError),
+                      max_tries=5, jitter=backoff.full_jitter)
+def _generate_completion(client, system_prompt, user_prompt, max_tokens=300):
+    """Run a single chat completion and return the stripped content"""
+    with _openai_sem:
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
             messages=[
-                {"role": "system", "content": "请用简练的几句话总结新闻文章的主要内容。请给出一个完整的中文summary。"},
-                {"role": "user", "content": f"请用中文总结这篇新闻：\n\n{content}"}
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
             ],
-            max_tokens=300,
-            temperature=0.7
+            max_tokens=max_tokens,
+            temperature=OPENAI_TEMPERATURE
         )
-        chinese_summary = chinese_response.choices[0].message.content.strip()
-        
+    return response.choices[0].message.content.strip()
+
+def generate_summaries(content):
+    """Generate English and Chinese summaries using OpenAI.
+
+    Results are cached in the summary_cache collection keyed by a hash of
+    the content, so re-runs over the same articles (crash, retry, partial
+    failure) don't pay for the same OpenAI calls twice.
+    """
+    # Empty or trivially short content can't produce a real summary;
+    # skip the paid calls outright instead of translating a fallback
+    if not content or len(content.strip()) < 50:
+        logger.warning("Skipping summaries for empty or too-short content")
+        return {"english_summary": "", "chinese_summary": ""}
+
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    try:
+        cached = db.collection('summary_cache').document(content_hash).get()
+        if cached.exists:
+            data = cached.to_dict()
+            logger.info("Using cached summaries")
+            return {
+                "english_summary": data.get('english_summary', ''),
+                "chinese_summary": data.get('chinese_summary', '')
+            }
+    except Exception as e:
+        logger.warning(f"Summary cache lookup failed: {str(e)}")
+
+    try:
+        client = get_openai_client()
+
+        # The two summaries are independent, so run both calls concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            english_future = executor.submit(
+                _generate_completion, client,
+                "Create a concise 2-3 sentence summary of the news article.",
+                f"Summarize this news article:\n\n{content}",
+                ENGLISH_SUMMARY_MAX_TOKENS
+            )
+            chinese_future = executor.submit(
+                _generate_completion, client,
+                "请用简练的几句话总结新闻文章的主要内容。请给出一个完整的中文summary。",
+                f"请用中文总结这篇新闻：\n\n{content}",
+                CHINESE_SUMMARY_MAX_TOKENS
+            )
+            english_summary = english_future.result()
+            chinese_summary = chinese_future.result()
+
+        if chinese_summary and not contains_chinese(chinese_summary):
+            logger.warning("Generated Chinese summary contains no Chinese characters")
+
+        # Only cache complete results so a failed half can be regenerated
+        if english_summary and chinese_summary:
+            try:
+                db.collection('summary_cache').document(content_hash).set({
+                    'english_summary': english_summary,
+                    'chinese_summary': chinese_summary,
+                    'created_at': datetime.now(pytz.timezone('Asia/Dubai')).strftime("%Y-%m-%d %H:%M:%S")
+                })
+            except Exception as e:
+                logger.warning(f"Failed to write summary cache: {str(e)}")
+
         return {
             "english_summary": english_summary,
             "chinese_summary": chinese_summary
@@ -193,6 +395,53 @@ def generate_summaries(content):
             "chinese_summary": ""
         }
 
+def _summarize_article(args):
+    """Generate summaries and assemble the payload for one article.
+
+    `args` is (doc_id, data, chinese_title); the title is translated
+    beforehand in bulk. Returns (cleaned_source, article_data), or None
+    for a malformed article — an exception escaping a worker would
+    surface at the caller's for loop and abort the whole run. Safe to
+    run from worker threads: all Firestore writes stay in the caller.
+    """
+    doc_id, data, chinese_title = args
+    try:
+        # Pull each field out of the dict once rather than re-hashing keys
+        # for every use below
+        title = data['title']
+        article_date = data['date']
+        content = data['content']
+        source = data['source']
+        cleaned_source = clean_source_name(source)
+
+        # Reuse summaries already present on the source article (reruns,
+        # backfills) so only genuinely new content costs an OpenAI call
+        if data.get('english_summary') and data.get('chinese_summary'):
+            summaries = {
+                'english_summary': data['english_summary'],
+                'chinese_summary': data['chinese_summary']
+            }
+        else:
+            summaries = generate_summaries(content)
+
+        article_data = {
+            'article_info': {
+                'title': title,
+                'chinese_title': chinese_title,
+                'date': article_date,
+                'content': content,
+                'source': cleaned_source,
+                'original_source': source,
+                'original_doc_id': doc_id
+            },
+            'english_summary': summaries['english_summary'],
+            'chinese_summary': summaries['chinese_summary']
+        }
+        return cleaned_source, article_data
+    except Exception as e:
+        logger.error(f"Error processing article {doc_id}: {str(e)}")
+        return None
+
 def get_today_news(target_date=None):
     try:
         # Get target date or today's date in UTC+4 timezone
@@ -206,91 +455,96 @@ def get_today_news(target_date=None):
         # Delete old data first
         delete_old_data()
         
-        # Get all documents from the articles collection with retry
-        articles_ref = db.collection('articles')
-        try:
-            docs = list(articles_ref.stream())  # Convert to list to avoid streaming timeout
-        except Exception as e:
-            logger.error(f"Error fetching articles: {e}")
-            return
-        
-        if not docs:
-            logger.warning("No documents found in articles collection")
-            return
-        
-        logger.info(f"Found {len(docs)} total articles to process")
-        
+        # Query only today's articles server-side instead of streaming the
+        # whole collection and filtering in Python. Dates are stored as
+        # strings starting with YYYY-MM-DD, so a string range covers both
+        # plain dates and datetime suffixes.
+        tomorrow_str = (datetime.strptime(today_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        articles_query = (db.collection('articles')
+                          .where(filter=FieldFilter('date', '>=', today_str))
+                          .where(filter=FieldFilter('date', '<', tomorrow_str))
+                          .select(['title', 'date', 'content', 'source',
+                                   'chinese_title', 'english_summary', 'chinese_summary']))
+
         # Process articles
-        processed_count = 0
         matched_count = 0
         saved_count = 0
         source_counts = {}
         today_news_ref = db.collection('today_news')
-        
-        for doc in docs:
+
+        # Accumulate writes in a batch (Firestore allows up to 500 ops per commit)
+        batch = db.batch()
+        batch_count = 0
+
+        # Pull articles off the stream in chunks: the titles for a whole
+        # chunk go out as one batched OpenAI call, then the summaries run
+        # through the worker pool. The main thread keeps ownership of doc
+        # numbering and the Firestore batch, and only one chunk of
+        # documents is in memory at a time.
+        stream = articles_query.stream()
+        with ThreadPoolExecutor(max_workers=8) as executor, \
+                ThreadPoolExecutor(max_workers=1) as commit_pool:
+            # Batch commits run on their own worker so the write latency
+            # hides behind the next chunk's OpenAI calls
+            commit_futures = []
             try:
-                processed_count += 1
-                data = doc.to_dict()
-                article_date = data.get('date')
-                
-                if not article_date:
-                    continue
-                
-                if str(article_date).startswith(today_str):
-                    matched_count += 1
-                    logger.info(f"Found matching article {matched_count}: {doc.id}")
-                    
-                    if not all(key in data for key in ['title', 'date', 'content', 'source']):
-                        continue
-                    
-                    cleaned_source = clean_source_name(data['source'])
-                    source_counts[cleaned_source] = source_counts.get(cleaned_source, 0) + 1
-                    
-                    # Generate Chinese title and summaries
-                    chinese_title = generate_chinese_title(data['title'])
-                    summaries = generate_summaries(data['content'])
-                    
-                    article_data = {
-                        'article_info': {
-                            'title': data['title'],
-                            'chinese_title': chinese_title,
-                            'date': data['date'],
-                            'content': data['content'],
-                            'source': cleaned_source,
-                            'original_source': data['source'],
-                            'original_doc_id': doc.id
-                        },
-                        'english_summary': summaries['english_summary'],
-                        'chinese_summary': summaries['chinese_summary']
-                    }
-                    
-                    # Save to today_news collection with retry
-                    timestamp = int(time.time() * 1000)
-                    doc_id = f"{today_str}_{cleaned_source}_{timestamp}_{source_counts[cleaned_source]}"
-                    doc_ref = today_news_ref.document(doc_id)
-                    
-                    max_retries = 3
-                    for retry in range(max_retries):
-                        try:
-                            doc_ref.set(article_data)
-                            saved_count += 1
-                            logger.info(f"Successfully saved article {doc_id}")
-                            break
-                        except Exception as e:
-                            if retry == max_retries - 1:
-                                logger.error(f"Failed to save article {doc_id} after {max_retries} attempts: {e}")
-                            else:
-                                logger.warning(f"Retry {retry + 1} for saving article {doc_id}")
-                                time.sleep(2)
-                    
-                    # Wait 5 seconds before processing next article
-                    time.sleep(5)
-            
-            except Exception as e:
-                logger.error(f"Error processing article {doc.id}: {str(e)}")
-                continue
-        
-        logger.info(f"Total articles processed: {processed_count}")
+                while True:
+                    chunk = [(doc.id, doc.to_dict())
+                             for doc in itertools.islice(stream, TITLE_BATCH_SIZE)]
+                    if not chunk:
+                        break
+                    matched_count += len(chunk)
+
+                    valid = [(article_id, data) for article_id, data in chunk
+                             if all(key in data for key in ['title', 'date', 'content', 'source'])]
+                    # Source articles processed on an earlier run may already
+                    # carry a translation; only the missing ones hit OpenAI
+                    pending = [data['title'] for _, data in valid
+                               if not data.get('chinese_title')]
+                    translated = iter(translate_titles_batch(pending))
+                    chinese_titles = [data.get('chinese_title') or next(translated)
+                                      for _, data in valid]
+                    jobs = [(article_id, data, zh)
+                            for (article_id, data), zh in zip(valid, chinese_titles)]
+
+                    for result in executor.map(_summarize_article, jobs):
+                        if result is None:
+                            continue
+                        cleaned_source, article_data = result
+                        source_counts[cleaned_source] = source_counts.get(cleaned_source, 0) + 1
+
+                        timestamp = int(time.time() * 1000)
+                        doc_id = f"{today_str}_{cleaned_source}_{timestamp}_{source_counts[cleaned_source]}"
+                        batch.set(today_news_ref.document(doc_id), article_data)
+                        batch_count += 1
+                        saved_count += 1
+                        logger.info(f"Queued article {doc_id} for batch write")
+
+                        if batch_count >= 500:
+                            commit_futures.append(commit_pool.submit(safe_batch_commit, batch))
+                            logger.info(f"Submitted batch of {batch_count} articles for commit")
+                            batch = db.batch()
+                            batch_count = 0
+            finally:
+                # Flush queued writes even if the loop aborts mid-run, so
+                # a failure can't silently drop a partial batch, and
+                # surface commit failures
+                if batch_count > 0:
+                    commit_futures.append(commit_pool.submit(safe_batch_commit, batch))
+                    logger.info(f"Submitted final batch of {batch_count} articles for commit")
+                for future in commit_futures:
+                    future.result()
+
+        # Persist the per-source counters atomically so reporting can read
+        # one stats doc instead of re-streaming the collection
+        if source_counts:
+            stats_ref = db.collection('today_news_stats').document(today_str)
+            stats_ref.set({source: Increment(count)
+                           for source, count in source_counts.items()}, merge=True)
+
+        if matched_count == 0:
+            logger.warning(f"No articles found for date {today_str}")
+
         logger.info(f"Articles matching date {today_str}: {matched_count}")
         logger.info(f"Articles successfully saved: {saved_count}")
         
@@ -301,67 +555,62 @@ def get_today_news(target_date=None):
 def generate_summaries_for_today_news():
     """Generate English and Chinese summaries for existing today_news documents"""
     try:
-        # Get all documents from today_news collection
         today_news_ref = db.collection('today_news')
-        docs = today_news_ref.stream()
-        
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
+
+        # Use the shared OpenAI client
+        client = get_openai_client()
+
         processed_count = 0
-        for doc in docs:
-            try:
-                data = doc.to_dict()
-                content = data.get('article_info', {}).get('content')
-                
-                if not content:
-                    logger.warning(f"Skipping document {doc.id} - no content found")
+
+        # Page through the collection with query cursors instead of one
+        # potentially huge stream, so memory stays bounded and a stream
+        # timeout can't lose the whole run
+        page_query = today_news_ref.order_by('__name__').limit(100)
+        last_doc = None
+        while True:
+            query = page_query.start_after(last_doc) if last_doc else page_query
+            page = list(query.stream())
+            if not page:
+                break
+            last_doc = page[-1]
+
+            for doc in page:
+                try:
+                    # Field-path access deserializes just the content
+                    # string instead of converting the whole document
+                    content = doc.get('article_info.content')
+
+                    if not content:
+                        logger.warning(f"Skipping document {doc.id} - no content found")
+                        continue
+
+                    # Generate both summaries; _generate_completion backs off
+                    # on rate limits, so no fixed pacing is needed
+                    english_summary = _generate_completion(
+                        client,
+                        "You are a helpful assistant that creates concise news summaries.",
+                        f"Please provide a concise summary (around 2-3 sentences) of the following news article:\n\n{content}",
+                        max_tokens=ENGLISH_SUMMARY_MAX_TOKENS
+                    )
+                    chinese_summary = _generate_completion(
+                        client,
+                        "You are a helpful assistant that creates concise news summaries in Chinese.",
+                        f"请用中文简要总结以下新闻文章（2-3句话）：\n\n{content}",
+                        max_tokens=CHINESE_SUMMARY_MAX_TOKENS
+                    )
+
+                    # Update the document with both summaries
+                    doc.reference.update({
+                        'english_summary': english_summary,
+                        'chinese_summary': chinese_summary
+                    })
+
+                    processed_count += 1
+                    logger.info(f"Processed document {doc.id} ({processed_count} documents processed)")
+
+                except Exception as e:
+                    logger.error(f"Error processing document {doc.id}: {str(e)}")
                     continue
-                
-                # 1. Generate English summary
-                english_response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that creates concise news summaries."},
-                        {"role": "user", "content": f"Please provide a concise summary (around 2-3 sentences) of the following news article:\n\n{content}"}
-                    ],
-                    max_tokens=150,
-                    temperature=0.7
-                )
-                english_summary = english_response.choices[0].message.content.strip()
-                
-                # 2. Wait for 3 seconds before generating Chinese summary
-                logger.info("Waiting 3 seconds before generating Chinese summary...")
-                time.sleep(3)
-                
-                # 3. Generate Chinese summary directly from content
-                chinese_response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that creates concise news summaries in Chinese."},
-                        {"role": "user", "content": f"请用中文简要总结以下新闻文章（2-3句话）：\n\n{content}"}
-                    ],
-                    max_tokens=150,
-                    temperature=0.7
-                )
-                chinese_summary = chinese_response.choices[0].message.content.strip()
-                
-                # Update the document with both summaries
-                doc.reference.update({
-                    'english_summary': english_summary,
-                    'chinese_summary': chinese_summary
-                })
-                
-                processed_count += 1
-                logger.info(f"Processed document {doc.id} ({processed_count} documents processed)")
-                
-                # 4. Wait 3 seconds before next document
-                logger.info("Waiting 5 seconds before next document...")
-                time.sleep(5)
-                
-            except Exception as e:
-                logger.error(f"Error processing document {doc.id}: {str(e)}")
-                continue
         
         logger.info(f"Successfully processed {processed_count} documents")
         
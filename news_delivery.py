@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 import os
+import atexit
 import json
 import smtplib
+import jinja2
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_init import get_db
 import logging
 
 # Set up logging
@@ -23,6 +24,127 @@ logging.basicConfig(
 # Load environment variables
 load_dotenv()
 
+# Bind configuration once at import so repeated sends skip the env
+# lookups and a bad value (e.g. non-numeric SMTP_PORT) fails at startup
+SMTP_SERVER = os.getenv('SMTP_SERVER')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_USERNAME = os.getenv('SMTP_USERNAME')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+EMAIL_FROM = os.getenv('EMAIL_FROM')
+EMAIL_RECIPIENTS = [email.strip()
+                    for email in os.getenv('EMAIL_RECIPIENTS', '').split(',')
+                    if email.strip()]
+
+# The whole digest renders through one Jinja2 template compiled at
+# import: the loop runs in compiled code and autoescape covers every
+# interpolated field via markupsafe's C escaper
+_EMAIL_TMPL = jinja2.Environment(autoescape=True).from_string("""
+<html>
+    <body style="font-family: Arial, sans-serif;">
+        <h1>MENA/SEA News Today</h1>
+        <p>Date: {{ date }}</p>
+        {% for item in items %}
+    <div style="margin-bottom: 20px; padding: 15px; border: 1px solid #ddd;">
+        <h2>{{ item.title }}</h2>
+        <h3 style="color: #666;">{{ item.chinese_title }}</h3>
+        <p style="color: #888;">Source: {{ item.source }} | Date: {{ item.date }}</p>
+        <div style="margin: 10px 0;">
+            <p><strong>English Summary:</strong><br>{{ item.english_summary }}</p>
+            <p><strong>Chinese Summary:</strong><br>{{ item.chinese_summary }}</p>
+        </div>
+    </div>
+        {% endfor %}
+    </body>
+</html>
+""")
+
+def _incomplete_fields(item):
+    """Return the translation/summary fields missing from one item."""
+    return [field for field in ('chinese_title', 'english_summary', 'chinese_summary')
+            if not item.get(field)]
+
+def _backfill_item(client, item):
+    """Fallback: fill one item's missing fields with its own completion."""
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": (
+                    "For the input news title, return JSON "
+                    '{"chinese_title": <Chinese translation>, '
+                    '"english_summary": <1-2 sentence summary>, '
+                    '"chinese_summary": <1-2 sentence Chinese summary>}.'
+                )},
+                {"role": "user", "content": item['title']}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=250,
+            temperature=0.3
+        )
+        entry = json.loads(response.choices[0].message.content)
+        for field in _incomplete_fields(item):
+            item[field] = entry.get(field, '')
+    except Exception as e:
+        logging.warning(f"Could not backfill item '{item.get('title', '')[:50]}': {e}")
+
+def backfill_missing_fields(news_items):
+    """Fill missing chinese_title/summary fields with one OpenAI call.
+
+    Items from today_news normally arrive complete; after a partial
+    pipeline failure some fields can be blank. Rather than three calls
+    per broken item, one JSON-mode completion covers every incomplete
+    item in the digest and shares the system prompt tokens once.
+    """
+    # Items without a title give the model nothing to work from, so they
+    # are left as-is rather than burning a call on them
+    incomplete = [item for item in news_items
+                  if item.get('title') and _incomplete_fields(item)]
+    if not incomplete:
+        return news_items
+
+    try:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    except Exception as e:
+        logging.warning(f"Could not backfill missing fields: {e}")
+        return news_items
+
+    try:
+        payload = json.dumps(
+            [{"i": idx, "title": item['title']} for idx, item in enumerate(incomplete)],
+            ensure_ascii=False)
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": (
+                    "For each input news title, return JSON "
+                    '{"items": [{"i": <index>, "chinese_title": <Chinese translation>, '
+                    '"english_summary": <1-2 sentence summary>, '
+                    '"chinese_summary": <1-2 sentence Chinese summary>}, ...]}.'
+                )},
+                {"role": "user", "content": payload}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=250 * len(incomplete),
+            temperature=0.3
+        )
+        results = json.loads(response.choices[0].message.content)["items"]
+        for entry in results:
+            item = incomplete[entry["i"]]
+            for field in _incomplete_fields(item):
+                item[field] = entry.get(field, '')
+        logging.info(f"Backfilled missing fields for {len(incomplete)} items")
+    except Exception as e:
+        # Batched call failed (bad JSON, transient error): fall back to
+        # per-item completions, run concurrently so the total wait is the
+        # slowest call rather than the sum
+        logging.warning(f"Batched backfill failed, retrying per item: {e}")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for item in incomplete:
+                executor.submit(_backfill_item, client, item)
+
+    return news_items
+
 def mask_email(email):
     """Mask email address for logging purposes."""
     if '@' not in email:
@@ -34,24 +156,32 @@ def mask_email(email):
 def get_today_news():
     """Get all news from Firebase today_news collection."""
     try:
-        # Try to initialize Firebase
-        cred = credentials.Certificate(os.getenv('GOOGLE_APPLICATION_CREDENTIALS'))
-        firebase_admin.initialize_app(cred)
-        db = firestore.client()
-        
-        # Get all documents from today_news collection
+        # Initialize Firebase via the shared idempotent helper
+        db = get_db()
+
+
+        # Get all documents from today_news collection, fetching only the
+        # fields the email uses — the large content body stays off the wire
         news_ref = db.collection('today_news')
-        docs = news_ref.get()  # Get all documents
+        docs = news_ref.select([
+            'article_info.title',
+            'article_info.chinese_title',
+            'article_info.date',
+            'article_info.source',
+            'english_summary',
+            'chinese_summary'
+        ]).get()
         news_items = []
         
         for doc in docs:
             data = doc.to_dict()
-            # Extract only needed fields
+            # Extract only needed fields, resolving the nested dict once
+            info = data['article_info']
             news_item = {
-                'title': data['article_info']['title'],
-                'chinese_title': data['article_info']['chinese_title'],
-                'date': data['article_info']['date'],
-                'source': data['article_info']['source'],
+                'title': info['title'],
+                'chinese_title': info['chinese_title'],
+                'date': info['date'],
+                'source': info['source'],
                 'english_summary': data['english_summary'],
                 'chinese_summary': data['chinese_summary']
             }
@@ -65,62 +195,95 @@ def get_today_news():
         logging.error(f"Error accessing Firebase: {e}")
         return None
 
+class _SMTPPool:
+    """Lazily opened SMTP session reused for the life of the process.
+
+    The TLS handshake and AUTH run once; later sends health-check the
+    session with NOOP and reconnect only if the server dropped it. For
+    the one-shot cron run this costs nothing extra, and a long-lived
+    process (manual reruns, on-demand sends) skips the handshake on
+    every send after the first.
+    """
+    def __init__(self):
+        self._server = None
+
+    def get(self):
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+        server.starttls()
+        server.login(SMTP_USERNAME, SMTP_PASSWORD)
+        self._server = server
+        return server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+_smtp_pool = _SMTPPool()
+atexit.register(_smtp_pool.close)
+
+def send_messages(messages, to_addrs=None):
+    """Send a list of messages over the pooled SMTP session.
+
+    When to_addrs is given, recipients travel only in the SMTP envelope
+    (one MAIL FROM, N RCPT TO, one DATA) and never appear in a header,
+    so there is no Bcc header for smtplib to parse and strip per send.
+    """
+    server = _smtp_pool.get()
+    for msg in messages:
+        server.send_message(msg, from_addr=EMAIL_FROM, to_addrs=to_addrs)
+
 def send_email(news_items):
     """Send email with news items."""
     try:
-        # Email setup
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"MENA/SEA News Today - {datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
-        msg['From'] = os.getenv('EMAIL_FROM')
-        
-        # Get and validate recipients
-        recipients_str = os.getenv('EMAIL_RECIPIENTS', '')
-        if not recipients_str:
+        # Compute the date string once so subject and body always agree
+        today_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+        # Email setup: EmailMessage serializes once to bytes on send and
+        # encodes the non-ASCII (Chinese) content natively, without the
+        # legacy MIME classes' str round-trip
+        msg = EmailMessage()
+        msg['Subject'] = f"MENA/SEA News Today - {today_str}"
+        msg['From'] = EMAIL_FROM
+
+        # Validate recipients
+        recipients = EMAIL_RECIPIENTS
+        if not recipients:
             raise ValueError("No email recipients configured")
-            
-        recipients = [email.strip() for email in recipients_str.split(',')]
-        # Use BCC instead of To field
-        msg['Bcc'] = ', '.join(recipients)
-        # Set a generic To address (can be the sender's address)
-        msg['To'] = os.getenv('EMAIL_FROM')
+
+        # Recipients go in the SMTP envelope only; the visible To is the
+        # sender's own address so no reader sees the list
+        msg['To'] = EMAIL_FROM
         
         # Log masked recipients for debugging
         masked_recipients = [mask_email(email) for email in recipients]
         logging.info(f"Sending email to {len(recipients)} recipients: {', '.join(masked_recipients)}")
 
-        # Generate content
-        content = []
-        for item in news_items:
-            content.append(f"""
-                <div style="margin-bottom: 20px; padding: 15px; border: 1px solid #ddd;">
-                    <h2>{item['title']}</h2>
-                    <h3 style="color: #666;">{item['chinese_title']}</h3>
-                    <p style="color: #888;">Source: {item['source']} | Date: {item['date']}</p>
-                    <div style="margin: 10px 0;">
-                        <p><strong>English Summary:</strong><br>{item['english_summary']}</p>
-                        <p><strong>Chinese Summary:</strong><br>{item['chinese_summary']}</p>
-                    </div>
-                </div>
-            """)
-
-        html = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <h1>MENA/SEA News Today</h1>
-                <p>Date: {datetime.now(timezone.utc).strftime('%Y-%m-%d')}</p>
-                {''.join(content)}
-            </body>
-        </html>
-        """
-
-        msg.attach(MIMEText(html, 'html'))
-
-        # Send email
-        with smtplib.SMTP(os.getenv('SMTP_SERVER'), int(os.getenv('SMTP_PORT'))) as server:
-            server.starttls()
-            server.login(os.getenv('SMTP_USERNAME'), os.getenv('SMTP_PASSWORD'))
-            server.send_message(msg)
-            
+        # Warm the SMTP session while the body renders, so the TLS+AUTH
+        # handshake overlaps HTML assembly instead of following it
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            smtp_future = executor.submit(_smtp_pool.get)
+
+            body = _EMAIL_TMPL.render(date=today_str, items=news_items)
+            msg.set_content("This digest is best viewed as HTML.")
+            msg.add_alternative(body, subtype='html')
+
+            smtp_future.result()
+
+        # Send email over the already-open session
+        send_messages([msg], to_addrs=recipients)
+
+
         logging.info("Email sent successfully")
         return True
     except Exception as e:
@@ -130,6 +293,7 @@ def send_email(news_items):
 if __name__ == '__main__':
     news_items = get_today_news()
     if news_items:
+        backfill_missing_fields(news_items)
         send_email(news_items)
     else:
         logging.error("No news items available to send") 
\ No newline at end of file
@@ -1,22 +1,30 @@
 import base64
+import fnmatch
+import io
 import json
 import os
-from pathlib import Path
 
 def encode_firebase_credentials():
     """Encode Firebase credentials file to base64."""
-    # Find the Firebase credentials file
-    cred_files = list(Path('.').glob('*-firebase-adminsdk-*.json'))
-    if not cred_files:
+    # Find the Firebase credentials file: stop at the first match
+    # instead of materializing and stat-ing every file glob would touch
+    cred_file = None
+    with os.scandir('.') as entries:
+        for entry in entries:
+            if entry.is_file() and fnmatch.fnmatchcase(entry.name, '*-firebase-adminsdk-*.json'):
+                cred_file = entry.path
+                break
+    if cred_file is None:
         print("Error: No Firebase credentials file found.")
         print("Please make sure the file exists and matches the pattern: *-firebase-adminsdk-*.json")
         return None
-    
-    cred_file = cred_files[0]
     try:
+        # Encode straight from the file object in blocks, so the raw
+        # key bytes are never held in memory alongside the encoded copy
         with open(cred_file, 'rb') as f:
-            content = f.read()
-            return base64.b64encode(content).decode('utf-8')
+            buf = io.BytesIO()
+            base64.encode(f, buf)
+            return buf.getvalue().decode('ascii').replace('\n', '')
     except Exception as e:
         print(f"Error reading Firebase credentials: {e}")
         return None
@@ -38,12 +46,14 @@ def check_env_file():
             print(f"{var}=")
         return False
     
-    missing_vars = []
+    # Parse the file once into a set of defined keys instead of one
+    # substring scan per variable; this also ignores commented-out lines
+    # and tolerates whitespace around the key
     with open('.env', 'r') as f:
-        content = f.read()
-        for var in required_vars:
-            if f"{var}=" not in content:
-                missing_vars.append(var)
+        defined = {line.split('=', 1)[0].strip()
+                   for line in f
+                   if line.strip() and not line.lstrip().startswith('#') and '=' in line}
+    missing_vars = [var for var in required_vars if var not in defined]
     
     if missing_vars:
         print("Error: The following variables are missing in .env:")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Flask endpoints recording the email engagement events the dashboard reads.
+
+Opens, closes (with time spent), and link clicks land in the email_opens
+and email_clicks Firestore collections. The endpoints are meant to be
+referenced from the digest emails — a pixel <img> for opens and links
+routed through /track/click — but news_delivery does not embed them yet,
+so for now events only arrive from manually instrumented sends.
+"""
+import os
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from flask import Flask, Response, request, redirect
+from firebase_init import get_db
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('tracking.log'),
+        logging.StreamHandler()
+    ]
+)
+
+# Load environment variables
+load_dotenv()
+
+app = Flask(__name__)
+
+# 1x1 transparent GIF built once at import; every pixel response returns
+# this same bytes object instead of re-allocating the literal per request
+_PIXEL = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00'
+          b'!\xf9\x04\x01\x00\x00\x00\x00'
+          b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+# Headers are constant too; Response copies them per request, so only
+# the cheap dict copy and Response() construction remain on the hot path
+_PIXEL_HEADERS = {'Cache-Control': 'no-store',
+                  'Content-Length': str(len(_PIXEL))}
+
+def _pixel_response():
+    """Build the pixel response from the prebuilt body and headers."""
+    return Response(_PIXEL, mimetype='image/gif', headers=_PIXEL_HEADERS)
+
+# Open/click events buffer in a queue and a daemon thread commits them as
+# Firestore batches — one RPC per flush instead of one per event, so a
+# burst of simultaneous opens after a send can't pile up round-trips
+_event_q = queue.Queue()
+# Flush twice a second so events reach the dashboard promptly; the op
+# cap stays well under Firestore's 500-per-batch limit
+_FLUSH_INTERVAL = 0.5
+_BATCH_LIMIT = 400
+
+def _event_writer():
+    """Drain the event queue into batched commits on _FLUSH_INTERVAL."""
+    while True:
+        events = [_event_q.get()]
+        deadline = time.monotonic() + _FLUSH_INTERVAL
+        while len(events) < _BATCH_LIMIT:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(_event_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            db = get_db()
+            batch = db.batch()
+            for event in events:
+                ref = db.collection(event['coll']).document(event.get('doc_id'))
+                batch.set(ref, event['data'], merge=event.get('merge', False))
+            batch.commit()
+            logging.info(f"Committed batch of {len(events)} tracking events")
+        except Exception as e:
+            logging.error(f"Error committing tracking batch: {e}")
+
+threading.Thread(target=_event_writer, daemon=True).start()
+
+# Event timestamps have one-second granularity, so the formatted string
+# is cached per second instead of re-running strftime machinery on every
+# tracked open under load
+_ts_cache = (0, '')
+
+def _now_iso():
+    global _ts_cache
+    now = int(time.time())
+    cached_sec, cached_iso = _ts_cache
+    if now != cached_sec:
+        cached_iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _ts_cache = (now, cached_iso)
+    return cached_iso
+
+def track_email_open(tracking_id, user_agent):
+    """Queue an email open event for the batched writer.
+
+    The tracking id doubles as the document id, so the close handler can
+    address the open record directly instead of querying for it.
+    """
+    _event_q.put({'coll': 'email_opens', 'doc_id': tracking_id, 'data': {
+        'email_id': tracking_id,
+        'timestamp': _now_iso(),
+        'user_agent': user_agent,
+        'time_spent': 0
+    }})
+
+def track_email_close(tracking_id, time_spent):
+    """Queue the time-spent update for an open record.
+
+    A merge write against the known document id replaces the old
+    where+order_by+limit(1) index scan: one key-addressed write, no
+    composite index, and it batches with everything else.
+    """
+    _event_q.put({'coll': 'email_opens', 'doc_id': tracking_id, 'merge': True,
+                  'data': {
+                      'time_spent': time_spent,
+                      'closed_at': _now_iso()
+                  }})
+
+def track_link_click(tracking_id, url, user_agent):
+    """Queue a link click event for the batched writer."""
+    _event_q.put({'coll': 'email_clicks', 'data': {
+        'email_id': tracking_id,
+        'url': url,
+        'timestamp': _now_iso(),
+        'user_agent': user_agent
+    }})
+
+# Mail clients and image proxies re-fetch the pixel on every preview or
+# scroll; fetches of the same pixel from the same address within this
+# window count as one open
+_DEDUP_WINDOW = 60
+_recent_opens = {}
+
+def _is_duplicate_open(tracking_id, remote_addr):
+    now = time.monotonic()
+    key = (tracking_id, remote_addr)
+    last_seen = _recent_opens.get(key)
+    if last_seen is not None and now - last_seen < _DEDUP_WINDOW:
+        return True
+    if len(_recent_opens) > 10000:
+        _recent_opens.clear()
+    _recent_opens[key] = now
+    return False
+
+@app.route('/track/open/<tracking_id>')
+def tracking_pixel(tracking_id):
+    """Serve the tracking pixel and record the open in the background."""
+    # Clients that honor ETags skip the event write entirely with a 304
+    if request.headers.get('If-None-Match') == tracking_id:
+        return Response(status=304)
+    if not _is_duplicate_open(tracking_id, request.remote_addr):
+        # The raw header is stored as-is; request.user_agent would run
+        # werkzeug's UA parse on every pixel fetch for nothing
+        track_email_open(tracking_id, request.headers.get('User-Agent', ''))
+    resp = _pixel_response()
+    resp.headers['ETag'] = tracking_id
+    return resp
+
+@app.route('/track/close/<tracking_id>', methods=['POST'])
+def email_close(tracking_id):
+    """Record time spent reading, reported by the email's script on unload."""
+    payload = request.get_json(silent=True) or {}
+    time_spent = payload.get('time_spent', 0)
+    track_email_close(tracking_id, time_spent)
+    return '', 204
+
+@app.route('/track/click/<tracking_id>')
+def link_click(tracking_id):
+    """Record the click, then forward the reader to the article."""
+    url = request.args.get('url', '')
+    track_link_click(tracking_id, url, request.headers.get('User-Agent', ''))
+    if url:
+        return redirect(url)
+    return '', 204
+
+if __name__ == '__main__':
+    # waitress handles requests on a thread pool, so a burst of opens
+    # right after a send doesn't serialize behind Flask's dev server
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=int(os.getenv('TRACKING_PORT', '5000')),
+          threads=16, connection_limit=256)